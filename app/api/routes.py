@@ -3,11 +3,12 @@ API routes for the chatbot
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import logging
 
-router = APIRouter(prefix="/api", tags=["chat"])
+router = APIRouter(prefix="/api", tags=["chat"], default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 class Message(BaseModel):
@@ -24,7 +25,7 @@ class ChatResponse(BaseModel):
     confidence: float
     hallucination_risk: float
 
-@router.post("/chat", response_model=ChatResponse)
+@router.post("/chat")
 async def chat(request: ChatRequest):
     """
     Main chat endpoint
@@ -39,7 +40,8 @@ async def chat(request: ChatRequest):
         confidence = 0.85
         hallucination_risk = 0.05
         
-        return ChatResponse(
+        # model_construct skips validation; the payload is server-built
+        return ChatResponse.model_construct(
             response=response,
             sources=sources,
             confidence=confidence,
@@ -2,13 +2,15 @@
 Updated main application with full integration
 """
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
 from pydantic import BaseModel
 import logging
 
@@ -27,8 +29,8 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize services
-rag_service = RAGService()
 llm_service = AzureOpenAIService()
+rag_service = RAGService(embedding_service=llm_service)
 auth_service = AuthService()
 
 @asynccontextmanager
@@ -60,7 +62,8 @@ app = FastAPI(
     title="Enterprise GenAI Chatbot API",
     description="Production-ready RAG-based chatbot with Azure OpenAI",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -114,7 +117,7 @@ async def root():
     }
 
 # Authentication endpoints
-@app.post("/auth/login", response_model=LoginResponse)
+@app.post("/auth/login")
 async def login(request: LoginRequest):
     """Login endpoint"""
     token = auth_service.create_token(request.username, request.password)
@@ -123,13 +126,14 @@ async def login(request: LoginRequest):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
-    return LoginResponse(
+    # model_construct skips validation; the payload is server-built
+    return LoginResponse.model_construct(
         access_token=token,
         username=request.username
     )
 
 # Chat endpoints
-@app.post("/api/chat", response_model=ChatResponse)
+@app.post("/api/chat")
 async def chat(
     request: ChatRequest,
     current_user: TokenData = Depends(get_current_user)
@@ -143,13 +147,29 @@ async def chat(
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
         logger.info(f"Query from {current_user.username}: {request.query[:50]}...")
-        
+
+        # Serve repeated queries from the response cache
+        cached = rag_service.query_cache.get(request.query)
+        if cached:
+            logger.info("Query cache hit (exact match)")
+            return ORJSONResponse(cached)
+
+        # One embedding call serves both the semantic-cache probe and
+        # retrieval below: embed_query shares the service's LRU with
+        # _vector_retrieve, so the vector path hits the cache
+        query_embedding = await asyncio.to_thread(rag_service.embed_query, request.query)
+        if query_embedding:
+            cached = rag_service.query_cache.get_semantic(query_embedding)
+            if cached:
+                logger.info("Query cache hit (semantic match)")
+                return ORJSONResponse(cached)
+
         # Retrieve relevant documents
         top_k = int(os.getenv("TOP_K_RESULTS", 5))
-        retrieved_docs = rag_service.retrieve(request.query, top_k=top_k)
+        retrieved_docs = await rag_service.retrieve_async(request.query, top_k=top_k)
         
         if not retrieved_docs:
-            return ChatResponse(
+            return ChatResponse.model_construct(
                 response="No relevant documents found to answer your question.",
                 sources=[],
                 confidence=0.0,
@@ -162,23 +182,81 @@ async def chat(
         confidence = sum(doc[1] for doc in retrieved_docs) / len(retrieved_docs)
         
         # Generate response using LLM
-        response = rag_service.generate_response(request.query, context, llm_service)
-        
-        # Check for hallucination
-        hallucination_risk = llm_service.detect_hallucination(response, context)
-        
-        logger.info(f"Response generated - Confidence: {confidence:.2f}, Hallucination: {hallucination_risk:.2f}")
-        
-        return ChatResponse(
+        response = await rag_service.generate_response(request.query, context, llm_service)
+
+        hallucination_risk = await llm_service.detect_hallucination(response, context)
+
+        chat_response = ChatResponse.model_construct(
             response=response,
             sources=sources,
             confidence=confidence,
             hallucination_risk=hallucination_risk
         )
+
+        logger.info(f"Response generated - Confidence: {confidence:.2f}, Hallucination: {chat_response.hallucination_risk:.2f}")
+
+        # Never cache a failed completion: the sentinel would be replayed
+        # for the whole TTL, and the semantic level would spread it to
+        # paraphrased queries too
+        if not llm_service.is_failure_response(response):
+            rag_service.query_cache.put(request.query, chat_response.model_dump(), query_embedding)
+        return chat_response
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Streaming chat endpoint: emits LLM tokens as server-sent events so
+    perceived latency is first-token time rather than full generation
+    A final event carries sources, confidence and the hallucination score
+    """
+    if not request.query or request.query.strip() == "":
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    logger.info(f"Streaming query from {current_user.username}: {request.query[:50]}...")
+
+    top_k = int(os.getenv("TOP_K_RESULTS", 5))
+    retrieved_docs = await rag_service.retrieve_async(request.query, top_k=top_k)
+
+    async def event_stream():
+        if not retrieved_docs:
+            payload = {
+                "response": "No relevant documents found to answer your question.",
+                "sources": [],
+                "confidence": 0.0,
+                "hallucination_risk": 0.0
+            }
+            yield f"event: done\ndata: {orjson.dumps(payload).decode()}\n\n"
+            return
+
+        context = [doc[0] for doc in retrieved_docs]
+        sources = [f"chunk_{i}" for i in range(len(context))]
+        confidence = sum(doc[1] for doc in retrieved_docs) / len(retrieved_docs)
+
+        prompt = PromptTemplate.qa_template("\n---\n".join(context), request.query)
+        tokens = []
+        async for delta in llm_service.generate_completion_stream(prompt):
+            tokens.append(delta)
+            yield f"data: {orjson.dumps({'delta': delta}).decode()}\n\n"
+
+        # Hallucination is scored on the full text once streaming ends
+        response = "".join(tokens)
+        hallucination_risk = await llm_service.detect_hallucination(response, context)
+
+        payload = {
+            "sources": sources,
+            "confidence": confidence,
+            "hallucination_risk": hallucination_risk
+        }
+        yield f"event: done\ndata: {orjson.dumps(payload).decode()}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.post("/api/evaluate")
 async def evaluate_rag(current_user: TokenData = Depends(get_current_user)):
     """
@@ -203,7 +281,7 @@ async def evaluate_rag(current_user: TokenData = Depends(get_current_user)):
             "precision": precision,
             "recall": recall,
             "f1_score": f1,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
         logger.error(f"Error in evaluation: {str(e)}")
@@ -230,4 +308,11 @@ if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 5000))
     logger.info(f"Starting server on port {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WORKERS", 1))
+    )
@@ -2,9 +2,13 @@
 Authentication and security module with JWT
 """
 
+import hashlib
+import hmac
 import os
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 import jwt
 from fastapi import Depends, HTTPException, status, Header
 import logging
@@ -36,6 +40,19 @@ def create_access_token(user_id: str, username: str, expires_delta: Optional[tim
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+@lru_cache(maxsize=4096)
+def _decode_token(token: str) -> Tuple[dict, Optional[int]]:
+    """
+    Decode and verify a JWT, caching the result by raw token string
+    Expiry is checked by the caller so cached hits skip the HMAC work;
+    safe because tokens are immutable once signed
+    """
+    payload = jwt.decode(
+        token, SECRET_KEY, algorithms=[ALGORITHM],
+        options={"verify_exp": False}
+    )
+    return payload, payload.get("exp")
+
 async def verify_token(authorization: Optional[str] = Header(None)) -> TokenData:
     """Verify JWT token from Authorization header"""
     if not authorization:
@@ -50,7 +67,9 @@ async def verify_token(authorization: Optional[str] = Header(None)) -> TokenData
         if scheme.lower() != "bearer":
             raise ValueError("Invalid authorization scheme")
         
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload, exp = _decode_token(token)
+        if exp is None or exp < time.time():
+            raise jwt.ExpiredSignatureError("Token has expired")
         user_id: str = payload.get("user_id")
         username: str = payload.get("username")
         
@@ -77,26 +96,45 @@ async def verify_token(authorization: Optional[str] = Header(None)) -> TokenData
             detail="Invalid authorization header format. Use: Authorization: Bearer <token>"
         )
 
+PBKDF2_ITERATIONS = 100_000
+_SALT_BYTES = 16
+
 class AuthService:
     """Service for user authentication"""
-    
+
     def __init__(self):
-        # In production, use a real database
+        # In production, load password hashes from a real database
         self.users = {
-            "admin": "admin123",
-            "user": "user123"
+            username: self._hash_password(password)
+            for username, password in (("admin", "admin123"), ("user", "user123"))
         }
-    
+
+    @staticmethod
+    def _hash_password(password: str, salt: Optional[bytes] = None) -> bytes:
+        """Derive a salted PBKDF2-SHA256 hash for storage"""
+        if salt is None:
+            salt = os.urandom(_SALT_BYTES)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS)
+        return salt + digest
+
+    @staticmethod
+    def _verify_password(password: str, stored: bytes) -> bool:
+        """Constant-time comparison against the stored salted hash"""
+        salt, digest = stored[:_SALT_BYTES], stored[_SALT_BYTES:]
+        candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ITERATIONS)
+        return hmac.compare_digest(candidate, digest)
+
     def authenticate_user(self, username: str, password: str) -> Optional[dict]:
         """Authenticate user credentials"""
-        if username not in self.users:
+        stored = self.users.get(username)
+        if stored is None:
             logger.warning(f"Authentication failed: user {username} not found")
             return None
-        
-        if self.users[username] != password:
+
+        if not self._verify_password(password, stored):
             logger.warning(f"Authentication failed: incorrect password for user {username}")
             return None
-        
+
         logger.info(f"User {username} authenticated successfully")
         return {
             "user_id": f"user_{username}",
@@ -4,11 +4,27 @@ Azure OpenAI Service wrapper with real API integration
 
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
-from openai import AzureOpenAI
+import httpx
+from openai import AzureOpenAI, AsyncAzureOpenAI
 
 logger = logging.getLogger(__name__)
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def _hash_tokens(text: str):
+    """Hash whitespace tokens to a uint64 array for set-free membership tests"""
+    return np.fromiter(
+        (hash(token) & 0xFFFFFFFFFFFFFFFF for token in text.lower().split()),
+        dtype=np.uint64
+    )
+
 class AzureOpenAIService:
     """Service for Azure OpenAI integration"""
     
@@ -26,18 +42,28 @@ class AzureOpenAIService:
                 api_version="2024-02-15-preview",
                 azure_endpoint=self.endpoint
             )
+            # Async client for completions so the event loop multiplexes
+            # in-flight LLM calls instead of blocking per request
+            self.async_client = AsyncAzureOpenAI(
+                api_key=self.api_key,
+                api_version="2024-02-15-preview",
+                azure_endpoint=self.endpoint,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+                )
+            )
             logger.info("Azure OpenAI client initialized")
-    
-    def generate_completion(self, prompt: str, temperature: float = 0.7, max_tokens: int = 500) -> str:
+
+    async def generate_completion(self, prompt: str, temperature: float = 0.7, max_tokens: int = 500) -> str:
         """
         Generate completion using Azure OpenAI
         """
         try:
-            if not hasattr(self, 'client'):
+            if not hasattr(self, 'async_client'):
                 logger.error("Azure OpenAI client not initialized")
                 return "Azure OpenAI is not configured"
-            
-            response = self.client.chat.completions.create(
+
+            response = await self.async_client.chat.completions.create(
                 model=self.deployment,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature,
@@ -51,7 +77,39 @@ class AzureOpenAIService:
         except Exception as e:
             logger.error(f"Error generating completion: {str(e)}")
             return f"Error: {str(e)}"
+
+    @staticmethod
+    def is_failure_response(text: str) -> bool:
+        """
+        True when a completion string is one of the error sentinels
+        rather than a real answer, so callers can avoid caching or
+        post-processing failures
+        """
+        return text.startswith("Error:") or text == "Azure OpenAI is not configured"
     
+    async def generate_completion_stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 500):
+        """
+        Stream completion tokens as they arrive from Azure OpenAI
+        """
+        if not hasattr(self, 'async_client'):
+            logger.error("Azure OpenAI client not initialized")
+            yield "Azure OpenAI is not configured"
+            return
+
+        stream = await self.async_client.chat.completions.create(
+            model=self.deployment,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=0.95,
+            frequency_penalty=0,
+            presence_penalty=0,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for texts using Azure OpenAI
@@ -61,30 +119,47 @@ class AzureOpenAIService:
                 logger.error("Azure OpenAI client not initialized")
                 return []
             
-            embeddings = []
-            for text in texts:
-                # Use Azure OpenAI embedding endpoint
+            # Batch inputs per request instead of one round-trip per text;
+            # the embedding endpoint accepts arrays of inputs
+            batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", 256))
+            batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+            def embed_batch(batch: List[str]) -> List[List[float]]:
                 response = self.client.embeddings.create(
-                    input=text,
+                    input=batch,
                     model="text-embedding-ada-002"
                 )
-                embeddings.append(response.data[0].embedding)
-            
-            logger.info(f"Generated embeddings for {len(texts)} texts")
+                return [item.embedding for item in response.data]
+
+            embeddings = []
+            if len(batches) > 1:
+                # Issue batches concurrently so network round-trips overlap;
+                # executor.map keeps results in input order
+                max_workers = min(int(os.getenv("EMBEDDING_CONCURRENCY", 8)), len(batches))
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    for batch_embeddings in pool.map(embed_batch, batches):
+                        embeddings.extend(batch_embeddings)
+            elif batches:
+                embeddings = embed_batch(batches[0])
+
+            logger.info(f"Generated embeddings for {len(texts)} texts in {len(batches)} batches")
             return embeddings
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
             return []
     
-    def detect_hallucination(self, response: str, sources: List[str]) -> float:
+    async def detect_hallucination(self, response: str, sources: List[str]) -> float:
         """
         Detect hallucination score (0-1, where 0 = no hallucination)
         Uses Azure OpenAI to evaluate factuality
         """
         try:
-            if not hasattr(self, 'client'):
+            # The LLM-based check adds a full completion round-trip per chat
+            # turn, so it is opt-in
+            use_llm = os.getenv("HALLUCINATION_USE_LLM", "false").lower() == "true"
+            if not use_llm or not hasattr(self, 'client'):
                 return self._simple_hallucination_check(response, sources)
-            
+
             source_text = "\n".join(sources)
             
             evaluation_prompt = f"""Given the following sources and response, evaluate if the response is supported by the sources.
@@ -100,7 +175,7 @@ Response:
 
 Return ONLY a number between 0 and 1."""
             
-            score_text = self.generate_completion(evaluation_prompt, temperature=0)
+            score_text = await self.generate_completion(evaluation_prompt, temperature=0)
             
             try:
                 score = float(score_text.strip())
@@ -115,12 +190,22 @@ Return ONLY a number between 0 and 1."""
         """Simple fallback hallucination check"""
         if not sources:
             return 1.0
-        
-        source_text = " ".join(sources).lower()
-        response_words = set(response.lower().split())
-        source_words = set(source_text.split())
-        
-        supported_words = len(response_words & source_words)
-        hallucination_score = 1 - (supported_words / len(response_words)) if response_words else 1.0
-        
+
+        if NUMPY_AVAILABLE:
+            # Hashed-token membership test: np.isin probes a C-level hash
+            # table instead of materializing Python word sets per request
+            response_hashes = np.unique(_hash_tokens(response))
+            if response_hashes.size == 0:
+                return 1.0
+            source_hashes = _hash_tokens(" ".join(sources))
+            supported_words = int(np.isin(response_hashes, source_hashes).sum())
+            hallucination_score = 1 - supported_words / response_hashes.size
+        else:
+            source_text = " ".join(sources).lower()
+            response_words = set(response.lower().split())
+            source_words = set(source_text.split())
+
+            supported_words = len(response_words & source_words)
+            hallucination_score = 1 - (supported_words / len(response_words)) if response_words else 1.0
+
         return min(max(hallucination_score, 0), 1)
@@ -2,8 +2,14 @@
 RAG Service - Retrieval Augmented Generation pipeline with FAISS
 """
 
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
 import os
-from typing import List, Tuple
+import sys
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 import logging
 import pickle
 from pathlib import Path
@@ -17,6 +23,171 @@ except ImportError:
     FAISS_AVAILABLE = False
     logger.warning("FAISS not available, using fallback retrieval")
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from sentence_transformers import CrossEncoder
+    RERANKER_AVAILABLE = True
+except ImportError:
+    RERANKER_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+def _tune_faiss():
+    """
+    One-time FAISS runtime tuning at import
+    Pins OMP threads to physical cores (cpu_count reports logical),
+    lowers the batch size at which search switches to BLAS GEMM, and
+    warns when the installed wheel lacks the AVX2/AVX-512 kernels,
+    which run several times faster than the generic x86 build
+    """
+    try:
+        faiss.omp_set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+        faiss.cvar.distance_compute_blas_threshold = 16
+        if not (hasattr(faiss, 'swigfaiss_avx2') or hasattr(faiss, 'swigfaiss_avx512')):
+            logger.warning(
+                "faiss appears to be built without AVX2/AVX-512 kernels; "
+                "installing an optimized faiss-cpu wheel speeds up search 3-6x"
+            )
+    except Exception as e:
+        logger.warning(f"FAISS runtime tuning skipped: {str(e)}")
+
+
+if FAISS_AVAILABLE:
+    _tune_faiss()
+
+
+def _chunk_digest(text: str) -> int:
+    """
+    Whitespace-insensitive digest for chunk deduplication
+    xxh3 is non-cryptographic and an order of magnitude faster than the
+    hashlib digests; the built-in hash is an adequate fallback
+    """
+    normalized = " ".join(text.split())
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_intdigest(normalized.encode('utf-8'))
+    return hash(normalized)
+
+
+def _chunk_offsets(length: int, chunk_size: int, stride: int):
+    """
+    Compute (start, end) slice offsets for one document as int64 arrays
+    Pure array arithmetic with no Python-level loop, so the kernel is
+    also a drop-in candidate for numba @njit compilation
+    """
+    starts = np.arange(0, length, stride, dtype=np.int64)
+    ends = np.minimum(starts + chunk_size, length)
+    return starts, ends
+
+
+class QueryCache:
+    """
+    Two-level response cache for chat queries
+    Level 1 is an exact match on the normalized query string; level 2
+    matches the query embedding against cached embeddings by cosine
+    similarity, so paraphrased repeats of hot questions hit too
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = 3600, threshold: float = 0.95):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._exact = {}
+        # Semantic side: one row per normalized query, deduplicated via
+        # _semantic_pos so re-caching a hot query overwrites its row
+        # instead of appending a new one
+        self._semantic_pos = {}
+        self._embeddings = []
+        self._values = []
+
+    def get(self, query: str) -> Optional[dict]:
+        """Exact-match lookup on the normalized query"""
+        entry = self._exact.get(self._normalize(query))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._exact[self._normalize(query)]
+            return None
+        return value
+
+    def get_semantic(self, embedding: List[float]) -> Optional[dict]:
+        """Cosine-similarity lookup against cached query embeddings"""
+        if not NUMPY_AVAILABLE or not embedding or not self._embeddings:
+            return None
+
+        # Drop expired rows first so a dead hot entry cannot win the
+        # argmax and mask a valid match behind it
+        self._evict_expired(time.time())
+        if not self._embeddings:
+            return None
+
+        query_vec = self._normalize_vector(np.asarray(embedding, dtype=np.float32))
+        scores = np.stack(self._embeddings) @ query_vec
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return self._values[best][1]
+
+    def put(self, query: str, value: dict, embedding: Optional[List[float]] = None):
+        """Store a response under both cache levels"""
+        if len(self._exact) >= self.maxsize:
+            self.clear()
+
+        expires_at = time.time() + self.ttl
+        key = self._normalize(query)
+        self._exact[key] = (expires_at, value)
+
+        if NUMPY_AVAILABLE and embedding:
+            vec = self._normalize_vector(np.asarray(embedding, dtype=np.float32))
+            pos = self._semantic_pos.get(key)
+            if pos is not None:
+                self._embeddings[pos] = vec
+                self._values[pos] = (expires_at, value)
+            else:
+                if len(self._values) >= self.maxsize:
+                    self.clear()
+                self._semantic_pos[key] = len(self._values)
+                self._embeddings.append(vec)
+                self._values.append((expires_at, value))
+
+    def clear(self):
+        """Drop all cached entries (e.g. after documents are reloaded)"""
+        self._exact = {}
+        self._semantic_pos = {}
+        self._embeddings = []
+        self._values = []
+
+    def _evict_expired(self, now: float):
+        """Compact the semantic arrays, dropping expired rows"""
+        keep = [i for i, (expires_at, _) in enumerate(self._values) if expires_at >= now]
+        if len(keep) == len(self._values):
+            return
+        remap = {old: new for new, old in enumerate(keep)}
+        self._embeddings = [self._embeddings[i] for i in keep]
+        self._values = [self._values[i] for i in keep]
+        self._semantic_pos = {
+            key: remap[pos] for key, pos in self._semantic_pos.items() if pos in remap
+        }
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return query.strip().lower()
+
+    @staticmethod
+    def _normalize_vector(vec):
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
 
 class RAGService:
     """Service for Retrieval-Augmented Generation with Vector Search"""
@@ -27,48 +198,251 @@ class RAGService:
         self.embeddings = []
         self.vector_store = None
         self.embedding_service = embedding_service
-        self.index_path = "data/faiss_index.pkl"
-        
+        self.index_path = "data/faiss.index"
+        self.chunk_store_path = "data/chunks.pkl"
+        self._bm25 = None
+        self._chunk_token_sets = None
+        self.query_cache = QueryCache(
+            maxsize=int(os.getenv("QUERY_CACHE_SIZE", 10_000)),
+            ttl=int(os.getenv("QUERY_CACHE_TTL", 3600)),
+            threshold=float(os.getenv("QUERY_CACHE_THRESHOLD", 0.95))
+        )
+        self.rerank_enabled = (
+            RERANKER_AVAILABLE
+            and os.getenv("RERANK_ENABLED", "false").lower() == "true"
+        )
+        self._reranker = None
+        self._rerank_cache = {}
+        self._rerank_cache_ttl = int(os.getenv("RERANK_CACHE_TTL", 900))
+        # Normalized query embeddings keyed by query string; repeats of
+        # hot queries skip the embedding-API round-trip entirely
+        self._query_embedding_cache = OrderedDict()
+        self._query_embedding_cache_size = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 4096))
+        # Circuit breaker for the vector path: after repeated failures,
+        # stay on keyword retrieval for a cool-down instead of paying a
+        # failing embedding/FAISS call on every request
+        self._vector_failures = 0
+        self._vector_breaker_until = 0.0
+        self._vector_breaker_threshold = int(os.getenv("VECTOR_BREAKER_THRESHOLD", 3))
+        self._vector_breaker_cooldown = int(os.getenv("VECTOR_BREAKER_COOLDOWN", 30))
+
+    @property
+    def chunks(self) -> List[Tuple[str, str]]:
+        """
+        Chunk (text, source) tuples, materialized lazily
+        Chunks are stored structure-of-arrays: a texts list plus an int32
+        source-index array into a small source-name table, which halves
+        per-chunk object count and allows vectorized source filtering
+        """
+        if self._chunks_view is None:
+            if NUMPY_AVAILABLE and isinstance(self._chunk_sources, np.ndarray):
+                source_ids = self._chunk_sources.tolist()
+            else:
+                source_ids = self._chunk_sources
+            self._chunks_view = [
+                (text, self._source_names[src])
+                for text, src in zip(self._chunk_texts, source_ids)
+            ]
+        return self._chunks_view
+
+    @chunks.setter
+    def chunks(self, value: List[Tuple[str, str]]):
+        texts, source_ids, names, index_of = [], [], [], {}
+        for text, source in value:
+            texts.append(text)
+            idx = index_of.get(source)
+            if idx is None:
+                idx = index_of[source] = len(names)
+                names.append(source)
+            source_ids.append(idx)
+
+        self._chunk_texts = texts
+        self._source_names = names
+        self._chunk_sources = (
+            np.asarray(source_ids, dtype=np.int32) if NUMPY_AVAILABLE else source_ids
+        )
+        self._chunks_view = None
+        self._chunk_token_sets = None
+        self._bm25 = None
+
     def load_documents(self, doc_path: str) -> List[str]:
-        """Load documents from file path"""
+        """
+        Load documents from file path
+        Directory reads fan out across a thread pool so per-file disk
+        latency overlaps instead of serializing; reads release the GIL
+        """
         documents = []
         try:
             if os.path.isfile(doc_path):
-                with open(doc_path, 'r', encoding='utf-8') as f:
-                    documents.append(f.read())
+                documents.append(Path(doc_path).read_text(encoding='utf-8'))
             elif os.path.isdir(doc_path):
-                for file in os.listdir(doc_path):
-                    if file.endswith(('.txt', '.md')):
-                        filepath = os.path.join(doc_path, file)
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            documents.append(f.read())
-            
+                filepaths = [
+                    Path(doc_path, file)
+                    for file in sorted(os.listdir(doc_path))
+                    if file.endswith(('.txt', '.md'))
+                ]
+                if filepaths:
+                    with ThreadPoolExecutor(max_workers=min(16, len(filepaths))) as pool:
+                        documents = list(pool.map(
+                            lambda p: p.read_text(encoding='utf-8'), filepaths
+                        ))
+
             self.documents = documents
+            self.query_cache.clear()
             logger.info(f"Loaded {len(documents)} documents from {doc_path}")
             return documents
         except Exception as e:
             logger.error(f"Error loading documents: {str(e)}")
             return []
     
+    def iter_chunks(self, chunk_size: int = 1000, overlap: int = 200):
+        """
+        Lazily yield (chunk_text, source_document) tuples
+        Streams slices off the loaded documents without materializing an
+        intermediate list, so callers that only need one pass (embedding,
+        indexing) avoid holding every chunk in memory at once
+        """
+        stride = chunk_size - overlap
+        for doc_idx, doc in enumerate(self.documents):
+            source = sys.intern(f"doc_{doc_idx}")
+            for i in range(0, len(doc), stride):
+                yield doc[i:i + chunk_size], source
+
     def chunk_documents(self, chunk_size: int = 1000, overlap: int = 200) -> List[Tuple[str, str]]:
         """
         Split documents into overlapping chunks
         Returns list of (chunk_text, source_document) tuples
         """
-        chunks = []
-        for doc_idx, doc in enumerate(self.documents):
-            for i in range(0, len(doc), chunk_size - overlap):
-                chunk_text = doc[i:i + chunk_size]
-                chunks.append((chunk_text, f"doc_{doc_idx}"))
-        
-        self.chunks = chunks
-        logger.info(f"Created {len(chunks)} chunks from {len(self.documents)} documents")
-        return chunks
+        if NUMPY_AVAILABLE:
+            # Precompute slice offsets per document in one vectorized pass
+            # and fill the SoA fields directly
+            stride = chunk_size - overlap
+            texts, names, counts = [], [], []
+            seen = set()
+            for doc_idx, doc in enumerate(self.documents):
+                names.append(sys.intern(f"doc_{doc_idx}"))
+                starts, ends = _chunk_offsets(len(doc), chunk_size, stride)
+                kept = 0
+                for start, end in zip(starts.tolist(), ends.tolist()):
+                    chunk_text = doc[start:end]
+                    # Skip duplicated boilerplate (headers, footers, ...)
+                    # so it is embedded and indexed only once
+                    digest = _chunk_digest(chunk_text)
+                    if digest in seen:
+                        continue
+                    seen.add(digest)
+                    texts.append(chunk_text)
+                    kept += 1
+                counts.append(kept)
+
+            self._chunk_texts = texts
+            self._source_names = names
+            self._chunk_sources = np.repeat(np.arange(len(names), dtype=np.int32), counts)
+            self._chunks_view = None
+            self._chunk_token_sets = None
+            self._bm25 = None
+        else:
+            seen = set()
+            deduped = []
+            for chunk_text, source in self.iter_chunks(chunk_size, overlap):
+                digest = _chunk_digest(chunk_text)
+                if digest not in seen:
+                    seen.add(digest)
+                    deduped.append((chunk_text, source))
+            self.chunks = deduped
+        logger.info(f"Created {len(self._chunk_texts)} chunks from {len(self.documents)} documents")
+        self._chunk_token_sets = None
+        if NUMPY_AVAILABLE:
+            self._ensure_bm25_index()
+        return self.chunks
+
+    def _ensure_token_sets(self) -> List[frozenset]:
+        """
+        Casefold and tokenize each chunk once
+        The per-chunk frozensets are reused across queries so retrieval
+        no longer re-lowercases and re-splits the whole corpus per call
+        """
+        if self._chunk_token_sets is None or len(self._chunk_token_sets) != len(self._chunk_texts):
+            self._chunk_token_sets = [
+                frozenset(text.casefold().split()) for text in self._chunk_texts
+            ]
+        return self._chunk_token_sets
+
+    def _ensure_bm25_index(self):
+        """
+        Inverted BM25 index over chunk tokens
+        Postings map each token to the chunk ids containing it plus the
+        term frequencies, so a query touches only the posting lists of
+        its own terms instead of scanning every chunk
+        """
+        if self._bm25 is not None and len(self._bm25["doc_lens"]) == len(self._chunk_texts):
+            return self._bm25
+
+        postings = {}
+        doc_lens = np.zeros(len(self._chunk_texts), dtype=np.float32)
+        for chunk_id, text in enumerate(self._chunk_texts):
+            tokens = text.casefold().split()
+            doc_lens[chunk_id] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                postings.setdefault(token, ([], []))
+                postings[token][0].append(chunk_id)
+                postings[token][1].append(count)
+
+        num_chunks = max(len(self._chunk_texts), 1)
+        self._bm25 = {
+            "postings": {
+                token: (
+                    np.asarray(ids, dtype=np.int32),
+                    np.asarray(tfs, dtype=np.float32),
+                    math.log(1 + (num_chunks - len(ids) + 0.5) / (len(ids) + 0.5))
+                )
+                for token, (ids, tfs) in postings.items()
+            },
+            "doc_lens": doc_lens,
+            "avg_len": float(doc_lens.mean()) if len(doc_lens) else 1.0,
+        }
+        logger.info(f"Built BM25 index over {len(self._chunk_texts)} chunks ({len(postings)} terms)")
+        return self._bm25
+
+    def _bm25_retrieve(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """BM25 retrieval over the inverted index, scoring candidates only"""
+        index = self._ensure_bm25_index()
+        doc_lens, avg_len = index["doc_lens"], index["avg_len"] or 1.0
+        k1, b = 1.5, 0.75
+
+        scores = np.zeros(len(self._chunk_texts), dtype=np.float32)
+        for token in frozenset(query.casefold().split()):
+            entry = index["postings"].get(token)
+            if entry is None:
+                continue
+            ids, tfs, idf = entry
+            denom = tfs + k1 * (1 - b + b * doc_lens[ids] / avg_len)
+            scores[ids] += idf * tfs * (k1 + 1) / denom
+
+        top_k = min(top_k, scores.shape[0])
+        if top_k == 0:
+            return []
+        top_indices = np.argpartition(scores, -top_k)[-top_k:]
+        top_indices = top_indices[np.argsort(-scores[top_indices])]
+
+        # Normalize to (0, 1] so scores feed the same confidence math as
+        # the other retrieval backends
+        best = float(scores[top_indices[0]])
+        results = [
+            (self._chunk_texts[i], float(scores[i]) / best)
+            for i in top_indices
+            if scores[i] > 0
+        ]
+        logger.info(f"Retrieved {len(results)} chunks via BM25 search")
+        return results
     
     def build_vector_store(self) -> bool:
         """Build FAISS vector store from document chunks"""
         try:
-            if not self.chunks:
+            if not self._chunk_texts:
                 logger.warning("No chunks available. Call chunk_documents first.")
                 return False
             
@@ -80,8 +454,8 @@ class RAGService:
                 logger.warning("No embedding service provided. Skipping vector store build.")
                 return False
             
-            # Extract chunk texts
-            chunk_texts = [chunk[0] for chunk in self.chunks]
+            # Chunk texts are already stored as a flat list
+            chunk_texts = self._chunk_texts
             
             # Generate embeddings
             logger.info("Generating embeddings for chunks...")
@@ -94,21 +468,36 @@ class RAGService:
             # Create FAISS index
             try:
                 import numpy as np
-                embeddings_array = np.array(embeddings).astype('float32')
+                # Single-copy conversion: force the target dtype during
+                # the conversion instead of casting a float64 intermediate,
+                # and guarantee the C-contiguity FAISS requires
+                embeddings_array = np.ascontiguousarray(embeddings, dtype=np.float32)
+                # Normalize once so inner-product search returns cosine
+                # similarity directly
+                faiss.normalize_L2(embeddings_array)
                 dimension = embeddings_array.shape[1]
-                
-                self.vector_store = faiss.IndexFlatL2(dimension)
+
+                self.vector_store = self._create_index(dimension, len(embeddings_array))
+                if not self.vector_store.is_trained:
+                    self.vector_store.train(embeddings_array)
                 self.vector_store.add(embeddings_array)
+                self.vector_store = self._maybe_to_gpu(self.vector_store)
             except ImportError:
                 logger.warning("FAISS requires numpy - vector store build skipped")
                 return False
-            
+
             self.embeddings = embeddings
-            
-            # Save index
+
+            # Save index natively (C++ serialization, mmap-able on load)
+            # and the chunk texts separately; GPU indexes are cloned back
+            # to CPU first since only CPU indexes serialize
             os.makedirs("data", exist_ok=True)
-            with open(self.index_path, 'wb') as f:
-                pickle.dump((self.vector_store, self.chunks, self.embeddings), f)
+            index_to_save = self.vector_store
+            if getattr(index_to_save, "__class__", type(None)).__name__.startswith("Gpu"):
+                index_to_save = faiss.index_gpu_to_cpu(index_to_save)
+            faiss.write_index(index_to_save, self.index_path)
+            with open(self.chunk_store_path, 'wb') as f:
+                pickle.dump((self.chunks, self.embeddings), f)
             
             logger.info(f"Vector store built with {len(embeddings)} embeddings")
             return True
@@ -116,15 +505,104 @@ class RAGService:
             logger.error(f"Error building vector store: {str(e)}")
             return False
     
+    def _maybe_to_gpu(self, index):
+        """
+        Clone the index onto GPU 0 when CUDA devices are visible
+        No-op on CPU-only builds of faiss; search results are identical,
+        only throughput changes
+        """
+        try:
+            if hasattr(faiss, "get_num_gpus") and faiss.get_num_gpus() > 0:
+                resources = faiss.StandardGpuResources()
+                index = faiss.index_cpu_to_gpu(resources, 0, index)
+                logger.info("Moved FAISS index to GPU 0")
+        except Exception as e:
+            logger.warning(f"GPU index unavailable, staying on CPU: {str(e)}")
+        return index
+
+    def _create_index(self, dimension: int, num_vectors: int):
+        """
+        Create a FAISS index based on configuration and corpus size
+        Defaults to HNSW for sub-linear approximate search; switches to
+        IVF with nprobe tuning for large corpora
+        All variants use the inner-product metric; vectors are
+        L2-normalized before add/search so scores are cosine similarity
+        """
+        index_type = os.getenv("FAISS_INDEX_TYPE", "auto").lower()
+        if index_type == "auto":
+            index_type = "ivf" if num_vectors > 100_000 else "hnsw"
+
+        if index_type == "flat":
+            return faiss.IndexFlatIP(dimension)
+
+        if index_type == "sq8":
+            # Exhaustive search over 8-bit scalar-quantized vectors:
+            # exact-flat recall at 1/4 the memory, with int8 SIMD kernels
+            logger.info("Using flat SQ8 index")
+            return faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_8bit,
+                faiss.METRIC_INNER_PRODUCT
+            )
+
+        if index_type == "ivfpq":
+            # Product quantization: ~8x compression on top of IVF pruning
+            nlist = max(1, min(100, num_vectors // 39))
+            pq_m = int(os.getenv("FAISS_PQ_M", 16))
+            if dimension % pq_m != 0:
+                logger.warning(f"dimension {dimension} not divisible by FAISS_PQ_M={pq_m}, falling back to HNSW")
+            else:
+                quantizer = faiss.IndexFlatIP(dimension)
+                index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+                index.nprobe = int(os.getenv("FAISS_NPROBE", 32))
+                logger.info(f"Using IVF-PQ index (nlist={nlist}, M={pq_m}, nprobe={index.nprobe})")
+                return index
+
+        if index_type == "ivfsq8":
+            # 8-bit scalar quantization: 4x smaller vectors, and since
+            # search is memory-bandwidth-bound, correspondingly faster
+            nlist = max(1, int(math.sqrt(num_vectors)))
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer, dimension, nlist, faiss.ScalarQuantizer.QT_8bit,
+                faiss.METRIC_INNER_PRODUCT
+            )
+            index.nprobe = int(os.getenv("FAISS_NPROBE", 32))
+            logger.info(f"Using IVF-SQ8 index (nlist={nlist}, nprobe={index.nprobe})")
+            return index
+
+        if index_type == "ivf":
+            nlist = max(1, min(4096, num_vectors // 39))
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.nprobe = int(os.getenv("FAISS_NPROBE", 32))
+            logger.info(f"Using IVF index (nlist={nlist}, nprobe={index.nprobe})")
+            return index
+
+        index = faiss.IndexHNSWFlat(dimension, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+        logger.info("Using HNSW index (M=32, efConstruction=200)")
+        return index
+
     def load_vector_store(self) -> bool:
         """Load pre-built FAISS index from disk"""
         try:
-            if not os.path.exists(self.index_path):
+            if not (os.path.exists(self.index_path) and os.path.exists(self.chunk_store_path)):
                 logger.warning(f"Vector store not found at {self.index_path}")
                 return False
-            
-            with open(self.index_path, 'rb') as f:
-                self.vector_store, self.chunks, self.embeddings = pickle.load(f)
+
+            try:
+                # Memory-map the index so startup does not deserialize it
+                # and forked workers share the same pages
+                self.vector_store = faiss.read_index(
+                    self.index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+            except RuntimeError:
+                # Not every index type supports mmap reads
+                self.vector_store = faiss.read_index(self.index_path)
+            self.vector_store = self._maybe_to_gpu(self.vector_store)
+
+            with open(self.chunk_store_path, 'rb') as f:
+                self.chunks, self.embeddings = pickle.load(f)
             
             logger.info(f"Loaded vector store with {len(self.chunks)} chunks")
             return True
@@ -137,83 +615,238 @@ class RAGService:
         Retrieve relevant documents for a query using vector similarity
         Returns list of (chunk_text, relevance_score) tuples
         """
+        # Over-fetch candidates when the cross-encoder reranker will pick
+        # the final top_k; literal lookups (quoted phrases) bypass it
+        rerank = self.rerank_enabled and '"' not in query
+        fetch_k = int(os.getenv("RERANK_OVERSAMPLE", 30)) if rerank else top_k
+
+        # Skip the try/except entirely when the vector path cannot run:
+        # no vector store, no embedding service, or the breaker is open
+        vector_ready = (
+            self.vector_store is not None
+            and self.embedding_service is not None
+            and time.time() >= self._vector_breaker_until
+        )
+
+        if not vector_ready:
+            results = self._keyword_retrieve(query, fetch_k)
+        else:
+            try:
+                results = self._vector_retrieve(query, fetch_k)
+                self._vector_failures = 0
+            except (RuntimeError, ConnectionError, TimeoutError) as e:
+                # FAISS raises RuntimeError; the embedding client surfaces
+                # network errors. Anything else is a real bug and propagates
+                logger.error(f"Error retrieving documents: {str(e)}")
+                self._vector_failures += 1
+                if self._vector_failures >= self._vector_breaker_threshold:
+                    self._vector_breaker_until = time.time() + self._vector_breaker_cooldown
+                    logger.warning(
+                        f"Vector retrieval failed {self._vector_failures} times, "
+                        f"using keyword retrieval for {self._vector_breaker_cooldown}s"
+                    )
+                results = self._keyword_retrieve(query, fetch_k)
+
+        if rerank and len(results) > top_k:
+            results = self._rerank(query, results, top_k)
+        return results[:top_k]
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        Retrieve relevant documents for many queries in one FAISS call
+        Embeds the whole batch at once and issues a single (B, d) search,
+        so FAISS can use its BLAS matrix path instead of B separate
+        matrix-vector products
+        """
+        if not queries:
+            return []
+
         try:
-            # Try vector-based retrieval first
-            if self.vector_store and self.embedding_service:
-                return self._vector_retrieve(query, top_k)
-            else:
-                # Fallback to keyword-based retrieval
-                return self._keyword_retrieve(query, top_k)
+            if self.vector_store and self.embedding_service and NUMPY_AVAILABLE:
+                embeddings = self.embedding_service.generate_embeddings(queries)
+                if embeddings:
+                    query_array = np.ascontiguousarray(embeddings, dtype=np.float32)
+                    faiss.normalize_L2(query_array)
+                    if hasattr(self.vector_store, 'nprobe'):
+                        self.vector_store.nprobe = int(os.getenv("FAISS_NPROBE", 32))
+
+                    k = min(top_k, len(self._chunk_texts))
+                    distances, indices = self.vector_store.search(query_array, k)
+
+                    batch_results = []
+                    for row_distances, row_indices in zip(distances, indices):
+                        batch_results.append([
+                            (self._chunk_texts[idx], float(similarity))
+                            for similarity, idx in zip(row_distances, row_indices)
+                            if 0 <= idx < len(self._chunk_texts)
+                        ])
+                    logger.info(f"Retrieved chunks for {len(queries)} queries via batched vector search")
+                    return batch_results
         except Exception as e:
-            logger.error(f"Error retrieving documents: {str(e)}")
-            return self._keyword_retrieve(query, top_k)
+            logger.error(f"Batch retrieval error: {str(e)}")
+
+        return [self._keyword_retrieve(query, top_k) for query in queries]
+
+    def _rerank(self, query: str, candidates: List[Tuple[str, float]], top_k: int) -> List[Tuple[str, float]]:
+        """
+        Rerank retrieval candidates with a cross-encoder
+        Scores are cached per (query, chunk) pair with a TTL so repeated
+        queries skip the model entirely
+        """
+        if self._reranker is None:
+            self._reranker = CrossEncoder(
+                os.getenv("RERANKER_MODEL", "BAAI/bge-reranker-v2-m3")
+            )
+
+        now = time.time()
+        scores = {}
+        pending = []
+        for chunk_text, _ in candidates:
+            key = hash((query, chunk_text))
+            cached = self._rerank_cache.get(key)
+            if cached and cached[0] > now:
+                scores[key] = cached[1]
+            else:
+                pending.append((key, chunk_text))
+
+        if pending:
+            predicted = self._reranker.predict(
+                [(query, chunk_text) for _, chunk_text in pending],
+                batch_size=32
+            )
+            expires_at = now + self._rerank_cache_ttl
+            for (key, _), score in zip(pending, predicted):
+                scores[key] = float(score)
+                self._rerank_cache[key] = (expires_at, float(score))
+
+        # Keep the cache bounded; stale entries dominate once it grows
+        if len(self._rerank_cache) > 50_000:
+            self._rerank_cache = {
+                k: v for k, v in self._rerank_cache.items() if v[0] > now
+            }
+
+        reranked = sorted(
+            ((chunk_text, scores[hash((query, chunk_text))]) for chunk_text, _ in candidates),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        logger.info(f"Reranked {len(candidates)} candidates to top {top_k}")
+        return reranked[:top_k]
     
+    def _embed_query(self, query: str):
+        """
+        Embed a single query, LRU-cached by query string
+        Returns the L2-normalized (1, d) float32 array, or None on failure
+        """
+        cached = self._query_embedding_cache.get(query)
+        if cached is not None:
+            self._query_embedding_cache.move_to_end(query)
+            return cached
+
+        query_embedding = self.embedding_service.generate_embeddings([query])
+        if not query_embedding:
+            return None
+
+        query_array = np.ascontiguousarray(query_embedding, dtype=np.float32)
+        faiss.normalize_L2(query_array)
+
+        if len(self._query_embedding_cache) >= self._query_embedding_cache_size:
+            self._query_embedding_cache.popitem(last=False)
+        self._query_embedding_cache[query] = query_array
+        return query_array
+
+    def embed_query(self, query: str) -> Optional[List[float]]:
+        """
+        Public wrapper around the query-embedding LRU
+        Returns the normalized embedding as a plain list, so callers
+        (e.g. the semantic response cache) share one round trip with the
+        retrieval path instead of embedding the query twice
+        """
+        if not (NUMPY_AVAILABLE and FAISS_AVAILABLE) or self.embedding_service is None:
+            return None
+        query_array = self._embed_query(query)
+        return query_array[0].tolist() if query_array is not None else None
+
     def _vector_retrieve(self, query: str, top_k: int) -> List[Tuple[str, float]]:
-        """Vector-based retrieval using FAISS"""
-        try:
-            import numpy as np
-            # Generate query embedding
-            query_embedding = self.embedding_service.generate_embeddings([query])
-            if not query_embedding:
-                return []
-            
-            query_array = np.array(query_embedding).astype('float32')
-            
-            # Search in FAISS index
-            distances, indices = self.vector_store.search(query_array, min(top_k, len(self.chunks)))
-            
-            results = []
-            for distance, idx in zip(distances[0], indices[0]):
-                if idx < len(self.chunks):
-                    chunk_text = self.chunks[idx][0]
-                    # Convert distance to similarity score (0-1)
-                    similarity = 1 / (1 + distance)
-                    results.append((chunk_text, similarity))
-            
-            logger.info(f"Retrieved {len(results)} chunks via vector search")
-            return results
-        except Exception as e:
-            logger.error(f"Vector retrieval error: {str(e)}")
-            return []
-    
+        """
+        Vector-based retrieval using FAISS
+        Errors propagate to retrieve(), which owns fallback and the
+        circuit breaker
+        """
+        query_array = self._embed_query(query)
+        if query_array is None:
+            # generate_embeddings swallows its own errors and returns [],
+            # so an empty embedding IS the outage signal; raise it into
+            # retrieve() so the breaker counts it and keyword fallback runs
+            raise ConnectionError("query embedding unavailable")
+
+        # Apply the configured nprobe on IVF-family indexes, including
+        # ones loaded from disk that predate the current setting
+        if hasattr(self.vector_store, 'nprobe'):
+            self.vector_store.nprobe = int(os.getenv("FAISS_NPROBE", 32))
+
+        # Search in FAISS index
+        distances, indices = self.vector_store.search(query_array, min(top_k, len(self._chunk_texts)))
+
+        # Filter padding ids (-1) with one vectorized mask instead of
+        # per-element numpy scalar comparisons; inner product over
+        # normalized vectors IS the cosine similarity, no transform
+        row_indices, row_scores = indices[0], distances[0]
+        mask = (row_indices >= 0) & (row_indices < len(self._chunk_texts))
+        results = [
+            (self._chunk_texts[idx], score)
+            for idx, score in zip(
+                row_indices[mask].tolist(), row_scores[mask].astype(float).tolist()
+            )
+        ]
+
+        logger.info(f"Retrieved {len(results)} chunks via vector search")
+        return results
+
     def _keyword_retrieve(self, query: str, top_k: int) -> List[Tuple[str, float]]:
         """Keyword-based fallback retrieval"""
+        if NUMPY_AVAILABLE and self._chunk_texts:
+            try:
+                return self._bm25_retrieve(query, top_k)
+            except Exception as e:
+                logger.error(f"BM25 retrieval error: {str(e)}")
+
+        query_words = frozenset(query.casefold().split())
+        token_sets = self._ensure_token_sets()
+        if not query_words or not token_sets:
+            return []
+
         relevant_docs = []
-        query_words = set(query.lower().split())
-        
-        for chunk_text, source in self.chunks:
-            chunk_words = set(chunk_text.lower().split())
-            intersection = len(query_words & chunk_words)
-            relevance = intersection / len(query_words) if query_words else 0
-            
+        for i, chunk_words in enumerate(token_sets):
+            relevance = len(query_words & chunk_words) / len(query_words)
             if relevance > 0:
-                relevant_docs.append((chunk_text, relevance))
+                relevant_docs.append((self._chunk_texts[i], relevance))
         
         # Sort by relevance and return top_k
         relevant_docs.sort(key=lambda x: x[1], reverse=True)
         logger.info(f"Retrieved {len(relevant_docs[:top_k])} chunks via keyword search")
         return relevant_docs[:top_k]
-    
-    def generate_response(self, query: str, context: List[str], llm_service=None) -> str:
+
+    async def retrieve_async(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Run retrieve in a worker thread
+        Retrieval embeds the query over blocking HTTP and searches the
+        index; offloading keeps the event loop free for other requests
+        """
+        return await asyncio.to_thread(self.retrieve, query, top_k)
+
+    async def generate_response(self, query: str, context: List[str], llm_service=None) -> str:
         """
         Generate response using context from retrieved documents
         """
         if not context:
             return "No relevant documents found to answer your question."
-        
-        context_str = "\n---\n".join(context)
-        
-        prompt = f"""You are a helpful enterprise assistant. Answer the following question based ONLY on the provided context.
 
-Context:
-{context_str}
-
-Question: {query}
+        context_str = "\n---\n".join(context)
+        prompt = PromptTemplate.qa_template(context_str, query)
 
-Answer:"""
-        
         if llm_service:
-            return llm_service.generate_completion(prompt)
+            return await llm_service.generate_completion(prompt)
         else:
             return "LLM service not configured"
 
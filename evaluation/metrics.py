@@ -2,14 +2,29 @@
 Evaluation metrics for RAG system performance
 """
 
+import re
 from dataclasses import dataclass
-from typing import List
+from typing import List, Union
 import numpy as np
 
+_WORD_RE = re.compile(r'\w+')
+
+def _doc_hashes(docs: Union[List[str], np.ndarray]) -> np.ndarray:
+    """
+    Map doc ids to a sorted, deduplicated int64 hash array
+
+    Pre-hashed arrays pass through untouched, so batch evaluation can
+    hash each doc list once and reuse it across metric calls.
+    """
+    if isinstance(docs, np.ndarray):
+        return docs
+    hashes = np.fromiter((hash(doc) for doc in docs), dtype=np.int64, count=len(docs))
+    return np.unique(hashes)
+
 @dataclass
 class EvaluationMetrics:
     """Store and calculate RAG evaluation metrics"""
-    
+
     def __init__(self):
         self.metrics = {
             'precision': [],
@@ -18,53 +33,106 @@ class EvaluationMetrics:
             'hallucination_rate': [],
             'latency': []
         }
-    
-    def calculate_precision(self, retrieved_docs: List[str], relevant_docs: List[str]) -> float:
+        # Source vocabularies keyed by doc-list content, so evaluation
+        # runs that reuse one source set tokenize it once
+        self._source_cache = {}
+
+    def calculate_precision(self, retrieved_docs: Union[List[str], np.ndarray],
+                            relevant_docs: Union[List[str], np.ndarray],
+                            record: bool = True) -> float:
         """
         Calculate precision: relevant docs / retrieved docs
+
+        Doc lists are compared as sorted int64 hash arrays so the
+        intersection runs vectorized instead of through Python sets.
         """
         if len(retrieved_docs) == 0:
             return 0.0
-        relevant_count = len(set(retrieved_docs) & set(relevant_docs))
+        retrieved = _doc_hashes(retrieved_docs)
+        relevant = _doc_hashes(relevant_docs)
+        relevant_count = np.intersect1d(retrieved, relevant, assume_unique=True).size
         precision = relevant_count / len(retrieved_docs)
-        self.metrics['precision'].append(precision)
+        if record:
+            self.metrics['precision'].append(precision)
         return precision
-    
-    def calculate_recall(self, retrieved_docs: List[str], relevant_docs: List[str]) -> float:
+
+    def calculate_recall(self, retrieved_docs: Union[List[str], np.ndarray],
+                         relevant_docs: Union[List[str], np.ndarray],
+                         record: bool = True) -> float:
         """
         Calculate recall: relevant docs / all relevant docs
         """
         if len(relevant_docs) == 0:
             return 0.0
-        relevant_count = len(set(retrieved_docs) & set(relevant_docs))
+        retrieved = _doc_hashes(retrieved_docs)
+        relevant = _doc_hashes(relevant_docs)
+        relevant_count = np.intersect1d(retrieved, relevant, assume_unique=True).size
         recall = relevant_count / len(relevant_docs)
-        self.metrics['recall'].append(recall)
+        if record:
+            self.metrics['recall'].append(recall)
         return recall
-    
-    def calculate_f1(self, precision: float, recall: float) -> float:
+
+    def calculate_f1(self, precision: float, recall: float, record: bool = True) -> float:
         """Calculate F1 score"""
         if precision + recall == 0:
             return 0.0
         f1 = 2 * (precision * recall) / (precision + recall)
-        self.metrics['f1_score'].append(f1)
+        if record:
+            self.metrics['f1_score'].append(f1)
         return f1
-    
+
+    def evaluate_batch(self, retrieved_batch: List[List[str]],
+                       relevant_batch: List[List[str]]) -> List[dict]:
+        """
+        Evaluate many (retrieved, relevant) pairs in one pass
+
+        Each doc list is hashed and sorted once, then reused for both
+        precision and recall; recorded metrics are appended in bulk at
+        the end rather than inside the loop.
+        """
+        results = []
+        precisions, recalls, f1_scores = [], [], []
+        for retrieved_docs, relevant_docs in zip(retrieved_batch, relevant_batch):
+            retrieved = _doc_hashes(retrieved_docs)
+            relevant = _doc_hashes(relevant_docs)
+            relevant_count = np.intersect1d(retrieved, relevant, assume_unique=True).size
+            precision = relevant_count / len(retrieved_docs) if len(retrieved_docs) else 0.0
+            recall = relevant_count / len(relevant_docs) if len(relevant_docs) else 0.0
+            f1 = self.calculate_f1(precision, recall, record=False)
+            precisions.append(precision)
+            recalls.append(recall)
+            f1_scores.append(f1)
+            results.append({'precision': precision, 'recall': recall, 'f1_score': f1})
+        self.metrics['precision'].extend(precisions)
+        self.metrics['recall'].extend(recalls)
+        self.metrics['f1_score'].extend(f1_scores)
+        return results
+
     def detect_hallucination(self, response: str, source_docs: List[str]) -> float:
         """
         Detect hallucination rate by checking if response is supported by source docs
         Returns hallucination_rate: 0 (no hallucination) to 1 (complete hallucination)
         """
         # Simple heuristic: check if key phrases from response appear in source
-        words = set(response.lower().split())
-        source_words = set()
-        for doc in source_docs:
-            source_words.update(doc.lower().split())
-        
+        words = set(_WORD_RE.findall(response.lower()))
+
+        # Keyed by content: an id() key can be recycled by a later,
+        # different list and silently serve the wrong vocabulary
+        key = tuple(source_docs)
+        source_words = self._source_cache.get(key)
+        if source_words is None:
+            source_words = frozenset(
+                word for doc in source_docs for word in _WORD_RE.findall(doc.lower())
+            )
+            if len(self._source_cache) >= 128:
+                self._source_cache.clear()
+            self._source_cache[key] = source_words
+
         supported_words = len(words & source_words)
         hallucination_rate = 1 - (supported_words / len(words)) if words else 0
         self.metrics['hallucination_rate'].append(hallucination_rate)
         return hallucination_rate
-    
+
     def get_average_metrics(self) -> dict:
         """Get average of all recorded metrics"""
         averages = {}
@@ -74,7 +142,7 @@ class EvaluationMetrics:
             else:
                 averages[metric_name] = 0.0
         return averages
-    
+
     def print_report(self):
         """Print evaluation report"""
         averages = self.get_average_metrics()
@@ -88,17 +156,17 @@ class EvaluationMetrics:
 if __name__ == "__main__":
     # Example usage
     evaluator = EvaluationMetrics()
-    
+
     # Simulate evaluation
     retrieved = ["doc1", "doc2", "doc3"]
     relevant = ["doc1", "doc2", "doc4"]
-    
+
     precision = evaluator.calculate_precision(retrieved, relevant)
     recall = evaluator.calculate_recall(retrieved, relevant)
     f1 = evaluator.calculate_f1(precision, recall)
-    
+
     response = "Company provides health insurance"
     source_docs = ["Health insurance coverage starts on day 1", "Company pays 80% of premiums"]
     hallucination = evaluator.detect_hallucination(response, source_docs)
-    
+
     evaluator.print_report()
@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for production deployments
+
+Run with: gunicorn app.main:app -c gunicorn_conf.py
+
+preload_app loads the application (documents, vector store, OpenAI
+clients) once in the master before forking, so workers share the
+read-only pages copy-on-write instead of each loading its own copy.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WORKERS", 2 * os.cpu_count() + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+keepalive = 30
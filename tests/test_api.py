@@ -6,10 +6,20 @@ import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client():
+    # Module-scoped so the app is instantiated once for the whole file
     return TestClient(app)
 
+@pytest.fixture(scope="module")
+def token(client):
+    """Log in once and share the token across tests"""
+    response = client.post(
+        "/auth/login",
+        json={"username": "admin", "password": "admin123"}
+    )
+    return response.json()["access_token"]
+
 class TestHealthEndpoints:
     def test_health_check(self, client):
         """Test health check endpoint"""
@@ -64,16 +74,8 @@ class TestChatEndpoints:
         
         assert response.status_code == 403  # Forbidden
     
-    def test_chat_with_auth(self, client):
+    def test_chat_with_auth(self, client, token):
         """Test chat with valid authentication"""
-        # First login
-        login_response = client.post(
-            "/auth/login",
-            json={"username": "admin", "password": "admin123"}
-        )
-        token = login_response.json()["access_token"]
-        
-        # Then chat
         response = client.post(
             "/api/chat",
             json={"query": "What is the remote work policy?"},
@@ -87,14 +89,8 @@ class TestChatEndpoints:
         assert "confidence" in data
         assert "hallucination_risk" in data
     
-    def test_chat_empty_query(self, client):
+    def test_chat_empty_query(self, client, token):
         """Test chat with empty query"""
-        login_response = client.post(
-            "/auth/login",
-            json={"username": "admin", "password": "admin123"}
-        )
-        token = login_response.json()["access_token"]
-        
         response = client.post(
             "/api/chat",
             json={"query": ""},
@@ -104,6 +100,48 @@ class TestChatEndpoints:
         assert response.status_code == 400
 
 
+class TestChatStreamEndpoint:
+    def test_stream_without_auth(self, client):
+        """Test streaming chat without authentication"""
+        response = client.post(
+            "/api/chat/stream",
+            json={"query": "What is the remote work policy?"}
+        )
+
+        assert response.status_code == 401
+
+    def test_stream_empty_query(self, client, token):
+        """Test streaming chat with empty query"""
+        response = client.post(
+            "/api/chat/stream",
+            json={"query": ""},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == 400
+
+    def test_stream_done_event(self, client, token):
+        """Test SSE framing of the final done event"""
+        import orjson
+
+        response = client.post(
+            "/api/chat/stream",
+            json={"query": "What is the remote work policy?"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        # The stream always ends with a done event carrying a JSON payload
+        assert "event: done" in response.text
+        done_data = response.text.rsplit("data: ", 1)[1].strip()
+        payload = orjson.loads(done_data)
+        assert "confidence" in payload
+        assert "hallucination_risk" in payload
+        assert "sources" in payload
+
+
 class TestInfoEndpoint:
     def test_get_info(self, client):
         """Test info endpoint"""
@@ -5,7 +5,7 @@ Unit tests for RAG Service, Azure OpenAI, and Authentication
 import pytest
 import os
 from unittest.mock import Mock, patch, MagicMock
-from app.services.rag_service import RAGService, PromptTemplate
+from app.services.rag_service import RAGService, PromptTemplate, QueryCache
 from app.services.azure_openai import AzureOpenAIService
 from app.services.auth import AuthService, create_access_token, verify_token
 import jwt
@@ -47,6 +47,21 @@ class TestRAGService:
         assert len(results) > 0
         assert results[0][0] == "Company policy about remote work"
     
+    def test_bm25_ranking(self, rag_service):
+        """Test that BM25 ranks term-dense chunks first and normalizes scores"""
+        rag_service.chunks = [
+            ("vacation vacation vacation days policy", "doc_0"),
+            ("one mention of vacation among other words", "doc_1"),
+            ("completely unrelated content here", "doc_2")
+        ]
+
+        results = rag_service._keyword_retrieve("vacation days", top_k=3)
+
+        assert results[0][0].startswith("vacation vacation")
+        assert results[0][1] == 1.0
+        assert all(0 < score <= 1.0 for _, score in results)
+        assert all("unrelated" not in text for text, _ in results)
+
     def test_prompt_templates(self):
         """Test prompt templates"""
         context = "Test context"
@@ -58,6 +73,37 @@ class TestRAGService:
         assert "Answer:" in qa_prompt
 
 
+# Test query response cache
+class TestQueryCache:
+    def test_exact_hit_and_expiry(self):
+        """Test exact-match lookup and TTL expiry"""
+        cache = QueryCache(maxsize=10, ttl=3600)
+        cache.put("What is the policy?", {"response": "answer"})
+
+        assert cache.get("  what is the policy?  ") == {"response": "answer"}
+
+        expired = QueryCache(maxsize=10, ttl=-1)
+        expired.put("stale query", {"response": "old"})
+        assert expired.get("stale query") is None
+
+    def test_semantic_match(self):
+        """Test cosine-similarity lookup against cached embeddings"""
+        cache = QueryCache(maxsize=10, ttl=3600, threshold=0.95)
+        cache.put("remote policy", {"response": "answer"}, embedding=[1.0, 0.0])
+
+        assert cache.get_semantic([0.99, 0.05]) == {"response": "answer"}
+        assert cache.get_semantic([0.0, 1.0]) is None
+
+    def test_semantic_store_deduplicates(self):
+        """Test that re-caching one query does not grow the semantic store"""
+        cache = QueryCache(maxsize=100, ttl=3600)
+        for _ in range(50):
+            cache.put("hot query", {"response": "answer"}, embedding=[1.0, 0.0])
+
+        assert len(cache._values) == 1
+        assert len(cache._embeddings) == 1
+
+
 # Test Azure OpenAI Service
 class TestAzureOpenAIService:
     @pytest.fixture
@@ -142,5 +188,33 @@ class TestTokens:
         assert payload["username"] == "testuser"
 
 
+# Test evaluation metrics
+class TestEvaluationMetrics:
+    @pytest.fixture
+    def evaluator(self):
+        from evaluation.metrics import EvaluationMetrics
+        return EvaluationMetrics()
+
+    def test_evaluate_batch(self, evaluator):
+        """Test batch evaluation records one metric row per pair"""
+        results = evaluator.evaluate_batch(
+            [["doc1", "doc2", "doc3"], []],
+            [["doc1", "doc2", "doc4"], ["doc1"]]
+        )
+
+        assert results[0]["precision"] == pytest.approx(2 / 3)
+        assert results[0]["recall"] == pytest.approx(2 / 3)
+        assert results[1]["precision"] == 0.0
+        assert len(evaluator.metrics["precision"]) == 2
+        assert len(evaluator.metrics["f1_score"]) == 2
+
+    def test_detect_hallucination_fresh_lists(self, evaluator):
+        """Test that per-call fresh source lists get their own vocabulary"""
+        assert evaluator.detect_hallucination(
+            "alpha beta", ["alpha beta document"]) < 0.5
+        assert evaluator.detect_hallucination(
+            "gamma delta", ["entirely different words"]) == 1.0
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])